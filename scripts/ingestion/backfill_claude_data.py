@@ -9,7 +9,7 @@ Usage:
     python backfill_claude_data.py  # defaults to Jan 1 - yesterday
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
 import argparse
 import logging
@@ -100,7 +100,7 @@ if __name__ == "__main__":
                        default='2025-01-01',
                        help='Start date (YYYY-MM-DD), defaults to 2025-01-01')
     parser.add_argument('--end-date',
-                       default=(datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d'),
+                       default=(datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d'),
                        help='End date (YYYY-MM-DD), defaults to yesterday')
     parser.add_argument('--sleep',
                        type=int,
@@ -15,7 +15,7 @@ import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Dict, Any
 from google.cloud import bigquery
 
 logging.basicConfig(
@@ -37,7 +37,7 @@ def parse_json_field(field_str: str) -> Dict:
         return {}
 
 
-def transform_record(row: Dict[str, str]) -> Dict[str, Any]:
+def transform_record(row: Dict[str, str], ingestion_timestamp: str) -> Dict[str, Any]:
     """Transform CSV row to BigQuery schema"""
 
     # Parse JSON fields
@@ -81,7 +81,7 @@ def transform_record(row: Dict[str, str]) -> Dict[str, Any]:
         'device_id': row.get('device_id') or None,
         'user_agent': row.get('user_agent') or None,
         'ip_address': row.get('ip_address') or None,
-        'ingestion_timestamp': datetime.now(timezone.utc).isoformat(),
+        'ingestion_timestamp': ingestion_timestamp,
         'data_source': 'claude_activity_export'
     }
 
@@ -103,11 +103,12 @@ def load_csv_to_bigquery(
     # Read and transform CSV
     records = []
     skipped = 0
+    ingestion_timestamp = datetime.now(timezone.utc).isoformat()
 
     with open(csv_file, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            transformed = transform_record(row)
+            transformed = transform_record(row, ingestion_timestamp)
             if transformed:
                 records.append(transformed)
             else:
@@ -129,13 +130,20 @@ def load_csv_to_bigquery(
     max_date = max(dates)
     logger.info(f"Date range: {min_date} to {max_date}")
 
+    date_range_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("min_date", "DATE", min_date),
+            bigquery.ScalarQueryParameter("max_date", "DATE", max_date),
+        ]
+    )
+
     # Delete existing data for this date range (deduplication)
     delete_query = f"""
         DELETE FROM `{table_ref}`
-        WHERE activity_date BETWEEN '{min_date}' AND '{max_date}'
+        WHERE activity_date BETWEEN @min_date AND @max_date
     """
     logger.info(f"Deleting existing data for {min_date} to {max_date}")
-    delete_job = client.query(delete_query)
+    delete_job = client.query(delete_query, job_config=date_range_config)
     delete_job.result()
     deleted_rows = delete_job.num_dml_affected_rows or 0
     logger.info(f"Deleted {deleted_rows} existing rows")
@@ -159,13 +167,13 @@ def load_csv_to_bigquery(
             COUNT(DISTINCT user_email) as users,
             COUNT(DISTINCT event_type) as event_types
         FROM `{table_ref}`
-        WHERE activity_date BETWEEN '{min_date}' AND '{max_date}'
+        WHERE activity_date BETWEEN @min_date AND @max_date
         GROUP BY activity_date
         ORDER BY activity_date DESC
     """
 
     logger.info("Verifying data...")
-    verify_result = client.query(verify_query).result()
+    verify_result = client.query(verify_query, job_config=date_range_config).result()
 
     print("\n" + "="*60)
     print("LOAD SUMMARY")
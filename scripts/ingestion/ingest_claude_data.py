@@ -16,7 +16,7 @@ Usage:
 
 from google.cloud import bigquery, secretmanager
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 import time
 import os
@@ -31,6 +31,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class ClaudeAPIError(Exception):
+    """Claude Admin API error carrying the HTTP status code"""
+    def __init__(self, status_code: int, message: str):
+        self.status_code = status_code
+        self.message = message
+        super().__init__(f"API error {status_code}: {message}")
+
+
 class ClaudeAdminClient:
     """
     Client for Claude Admin API with automatic pagination and retry logic.
@@ -49,6 +57,9 @@ class ClaudeAdminClient:
             "x-api-key": api_key,
             "anthropic-version": "2023-06-01"
         }
+        # Reuse one connection pool across paginated requests
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
     def _request_with_retry(self, method: str, url: str, params: Dict = None, max_retries: int = 3) -> Dict:
         """
@@ -57,13 +68,13 @@ class ClaudeAdminClient:
         Handles:
         - 429 (Rate Limited): Exponential backoff (5s, 10s, 20s)
         - 500+ (Server Error): Exponential backoff (2s, 4s, 8s)
-        - Timeout: Retry with same backoff
+        - Timeout / connection error: Exponential backoff (2s, 4s, 8s)
         - 4xx (Client Error): No retry, raise immediately
         """
         for attempt in range(max_retries):
             try:
-                logger.debug(f"API request: {method} {url} (attempt {attempt+1}/{max_retries})")
-                response = requests.request(method, url, headers=self.headers, params=params, timeout=60)
+                logger.debug("API request: %s %s (attempt %d/%d)", method, url, attempt + 1, max_retries)
+                response = self.session.request(method, url, params=params, timeout=60)
 
                 if response.status_code == 200:
                     return response.json()
@@ -81,15 +92,19 @@ class ClaudeAdminClient:
                     continue
                 else:
                     # Client error - don't retry
-                    raise Exception(f"API error {response.status_code}: {response.text}")
+                    raise ClaudeAPIError(response.status_code, response.text)
 
-            except requests.Timeout:
+            except (requests.Timeout, requests.ConnectionError) as e:
                 if attempt < max_retries - 1:
-                    logger.warning("Request timeout. Retrying...")
+                    # Transient network error - retry
+                    wait_time = (2 ** attempt) * 2  # 2s, 4s, 8s
+                    logger.warning(f"{type(e).__name__} on request. Retrying in {wait_time}s...")
+                    time.sleep(wait_time)
                     continue
                 raise
 
-        raise Exception(f"Max retries ({max_retries}) exceeded")
+        # Only reached after retrying 429/5xx responses, so the last status is meaningful
+        raise ClaudeAPIError(response.status_code, f"Max retries ({max_retries}) exceeded")
 
     def get_cost_report(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """
@@ -315,6 +330,8 @@ class ClaudeDataIngestion:
         self.org_id = os.getenv('ANTHROPIC_ORGANIZATION_ID', '1233d3ee-9900-424a-a31a-fb8b8dcd0be3')
         self.claude_client = ClaudeAdminClient(self.api_key, self.org_id)
         self.bq_client = bigquery.Client()
+        # Table schema doesn't change between days - only check it once per run
+        self._productivity_schema_validated = False
 
     def _get_secret(self, secret_id: str) -> str:
         """Fetch secret from Google Secret Manager."""
@@ -331,7 +348,7 @@ class ClaudeDataIngestion:
             date: YYYY-MM-DD (defaults to yesterday)
         """
         if date is None:
-            date = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+            date = (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%d')
 
         logger.info(f"Starting Claude ingestion for {date}")
 
@@ -361,10 +378,10 @@ class ClaudeDataIngestion:
             logger.warning(f"No records to load for {table_name}")
             return
 
-        # Add ingestion timestamp
-        from datetime import timezone
+        # Add ingestion timestamp (one value for the whole batch)
+        ingestion_timestamp = datetime.now(timezone.utc).isoformat()
         for record in records:
-            record['ingestion_timestamp'] = datetime.now(timezone.utc).isoformat()
+            record['ingestion_timestamp'] = ingestion_timestamp
 
         table_id = f"ai_usage_analytics.{table_name}"
         errors = self.bq_client.insert_rows_json(table_id, records)
@@ -376,13 +393,36 @@ class ClaudeDataIngestion:
 
     def _validate_ingestion(self, date: str):
         """Validate ingested data quality."""
-        # Check total cost is reasonable
-        query = f"""
-        SELECT SUM(amount_usd) as total_cost
-        FROM `ai_usage_analytics.claude_costs`
-        WHERE activity_date = '{date}'
+        # Check total cost and duplicates in a single scan of the day's costs
+        query = """
+        SELECT
+          SUM(group_cost) as total_cost,
+          COUNTIF(cnt > 1) as dup_count
+        FROM (
+          SELECT workspace_id, model, token_type, SUM(amount_usd) as group_cost, COUNT(*) as cnt
+          FROM `ai_usage_analytics.claude_costs`
+          WHERE activity_date = @date
+          GROUP BY workspace_id, model, token_type
+        )
         """
-        result = list(self.bq_client.query(query))[0]
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("date", "DATE", date)]
+        )
+        cost_job = self.bq_client.query(query, job_config=job_config)
+
+        # Check productivity table has no cost columns (skipped on repeat days in backfills).
+        # Submitted before waiting on cost_job so both queries run concurrently.
+        schema_job = None
+        if not self._productivity_schema_validated:
+            query = """
+            SELECT COUNT(*) as cost_column_count
+            FROM `ai_usage_analytics.INFORMATION_SCHEMA.COLUMNS`
+            WHERE TABLE_NAME = 'claude_code_productivity'
+              AND (COLUMN_NAME LIKE '%cost%' OR COLUMN_NAME LIKE '%amount%')
+            """
+            schema_job = self.bq_client.query(query)
+
+        result = next(iter(cost_job.result()))
         total_cost = float(result.total_cost or 0)
 
         # Alert if suspiciously high (potential double-counting or cents bug)
@@ -390,30 +430,14 @@ class ClaudeDataIngestion:
             raise Exception(f"Validation failed: Total cost ${total_cost:.2f} exceeds threshold (possible cents conversion bug!)")
 
         # Check for duplicates
-        query = f"""
-        SELECT COUNT(*) as dup_count
-        FROM (
-          SELECT activity_date, workspace_id, model, token_type, COUNT(*) as cnt
-          FROM `ai_usage_analytics.claude_costs`
-          WHERE activity_date = '{date}'
-          GROUP BY activity_date, workspace_id, model, token_type
-          HAVING cnt > 1
-        )
-        """
-        result = list(self.bq_client.query(query))[0]
         if result.dup_count > 0:
             raise Exception(f"Validation failed: {result.dup_count} duplicate records found")
 
-        # Check productivity table has no cost columns
-        query = """
-        SELECT COLUMN_NAME
-        FROM `ai_usage_analytics.INFORMATION_SCHEMA.COLUMNS`
-        WHERE TABLE_NAME = 'claude_code_productivity'
-          AND (COLUMN_NAME LIKE '%cost%' OR COLUMN_NAME LIKE '%amount%')
-        """
-        result = list(self.bq_client.query(query))
-        if len(result) > 0:
-            raise Exception(f"Schema validation failed: Found cost columns in productivity table")
+        if schema_job is not None:
+            result = next(iter(schema_job.result()))
+            if result.cost_column_count > 0:
+                raise Exception(f"Schema validation failed: Found cost columns in productivity table")
+            self._productivity_schema_validated = True
 
         logger.info(f"Validation passed: ${total_cost:.2f}, no duplicates, no cost columns in productivity")
 
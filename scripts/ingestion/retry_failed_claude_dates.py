@@ -15,13 +15,11 @@ import os
 import time
 import argparse
 import logging
-from datetime import datetime, timezone
-from pathlib import Path
 from google.cloud import bigquery
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from ingest_claude_data import ClaudeDataIngestion
+from ingest_claude_data import ClaudeAPIError, ClaudeDataIngestion
 
 logging.basicConfig(
     level=logging.INFO,
@@ -34,10 +32,10 @@ def get_missing_dates_from_bigquery(start_date: str = '2025-06-01', end_date: st
     """Query BigQuery to find missing dates in range"""
     bq_client = bigquery.Client(project='ai-workflows-459123')
 
-    query = f"""
+    query = """
     WITH expected_dates AS (
       SELECT date
-      FROM UNNEST(GENERATE_DATE_ARRAY('{start_date}', '{end_date}')) as date
+      FROM UNNEST(GENERATE_DATE_ARRAY(@start_date, @end_date)) as date
     ),
     actual_dates AS (
       SELECT DISTINCT activity_date as date
@@ -50,7 +48,14 @@ def get_missing_dates_from_bigquery(start_date: str = '2025-06-01', end_date: st
     ORDER BY e.date
     """
 
-    result = bq_client.query(query).result()
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
+            bigquery.ScalarQueryParameter("end_date", "DATE", end_date),
+        ]
+    )
+
+    result = bq_client.query(query, job_config=job_config).result()
     return [row.date.isoformat() for row in result]
 
 
@@ -106,7 +111,7 @@ def retry_failed_dates(dates_file: str = None, auto_detect: bool = False, delay_
             failed_dates.append(date_str)
             error_msg = str(e)
 
-            if '429' in error_msg or 'rate_limit' in error_msg.lower():
+            if isinstance(e, ClaudeAPIError) and e.status_code == 429:
                 logger.error(f"❌ RATE LIMITED: {date_str}")
                 logger.warning(f"Increasing delay to {delay_seconds * 2}s to recover...")
                 time.sleep(delay_seconds * 2)  # Extra delay after rate limit
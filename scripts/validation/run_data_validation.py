@@ -5,6 +5,7 @@ Runs validation queries and compares results against expected dashboard values
 """
 
 import os
+from collections import Counter
 from google.cloud import bigquery
 from datetime import datetime
 from typing import Dict, List, Any
@@ -277,8 +278,13 @@ class DataValidator:
 
         results = self.run_query(query, "Missing Partitions Check")
 
-        missing_cursor = [r["date"] for r in results if not r["has_cursor_data"]]
-        missing_claude = [r["date"] for r in results if not r["has_claude_data"]]
+        missing_cursor = []
+        missing_claude = []
+        for r in results:
+            if not r["has_cursor_data"]:
+                missing_cursor.append(r["date"])
+            if not r["has_claude_data"]:
+                missing_claude.append(r["date"])
 
         status = "PASSED" if not (missing_cursor or missing_claude) else "WARNING"
 
@@ -288,8 +294,8 @@ class DataValidator:
             "missing_cursor_dates": [str(d) for d in missing_cursor],
             "missing_claude_dates": [str(d) for d in missing_claude],
             "total_days_expected": len(results),
-            "cursor_days_present": len([r for r in results if r["has_cursor_data"]]),
-            "claude_days_present": len([r for r in results if r["has_claude_data"]])
+            "cursor_days_present": len(results) - len(missing_cursor),
+            "claude_days_present": len(results) - len(missing_claude)
         }
 
     def generate_report(self) -> str:
@@ -325,9 +331,10 @@ class DataValidator:
         print("VALIDATION SUMMARY")
         print("="*80)
 
-        passed = sum(1 for r in self.validation_results if r.get("status") == "PASSED")
-        failed = sum(1 for r in self.validation_results if r.get("status") == "FAILED")
-        warnings = sum(1 for r in self.validation_results if r.get("status") == "WARNING")
+        status_counts = Counter(r.get("status") for r in self.validation_results)
+        passed = status_counts["PASSED"]
+        failed = status_counts["FAILED"]
+        warnings = status_counts["WARNING"]
 
         print(f"\nTotal Validations: {len(self.validation_results)}")
         print(f"  ✓ PASSED:  {passed}")
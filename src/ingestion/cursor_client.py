@@ -7,7 +7,7 @@ Provides methods to fetch team usage metrics and spending data.
 
 import time
 import logging
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 import requests
 from requests.auth import HTTPBasicAuth
@@ -56,6 +56,12 @@ class CursorAdminClient:
                     time.sleep(wait_time)
                     continue
 
+                if response.status_code >= 500 and attempt < max_retries - 1:  # Server error
+                    wait_time = 2 ** attempt
+                    logger.warning(f"Server error {response.status_code}, retrying in {wait_time}s")
+                    time.sleep(wait_time)
+                    continue
+
                 # Other errors
                 raise CursorAPIError(
                     response.status_code,
@@ -63,10 +69,10 @@ class CursorAdminClient:
                     response.json() if response.text else None
                 )
 
-            except requests.exceptions.Timeout:
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
                 if attempt == max_retries - 1:
                     raise
-                logger.warning(f"Timeout on attempt {attempt + 1}, retrying...")
+                logger.warning(f"{type(e).__name__} on attempt {attempt + 1}, retrying...")
                 time.sleep(2 ** attempt)
 
         raise CursorAPIError(500, "Max retries exceeded")
@@ -13,7 +13,8 @@ import sys
 import os
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Any, Optional
+from decimal import Decimal
+from typing import Dict, List, Any
 from google.cloud import bigquery, secretmanager
 from cursor_client import CursorAdminClient
 
@@ -37,7 +38,11 @@ def get_cursor_api_key(secret_client: secretmanager.SecretManagerServiceClient)
     return response.payload.data.decode('UTF-8')
 
 
-def transform_usage_record(record: Dict[str, Any], activity_date: datetime) -> Dict[str, Any]:
+def transform_usage_record(
+    record: Dict[str, Any],
+    activity_date: datetime,
+    ingestion_timestamp: str
+) -> Dict[str, Any]:
     """Transform API usage record to BigQuery schema"""
     return {
         'activity_date': activity_date.date().isoformat(),
@@ -65,35 +70,39 @@ def transform_usage_record(record: Dict[str, Any], activity_date: datetime) -> D
         'apply_most_used_extension': record.get('applyMostUsedExtension', ''),
         'tab_most_used_extension': record.get('tabMostUsedExtension', ''),
         'client_version': record.get('clientVersion', ''),
-        'ingestion_timestamp': datetime.now(timezone.utc).isoformat(),
+        'ingestion_timestamp': ingestion_timestamp,
         'daily_spend_usd': None  # Will be calculated separately
     }
 
 
-def get_previous_cumulative_spend(
+def get_previous_cumulative_spends(
     bq_client: bigquery.Client,
-    user_email: str,
+    user_emails: List[str],
     current_date: datetime,
     billing_cycle_start: datetime
-) -> float:
+) -> Dict[str, float]:
     """
-    Get cumulative spend for user up to (but not including) current_date.
+    Get cumulative spend per user up to (but not including) current_date.
 
     This sums all daily_spend_usd values in the current billing cycle
     to reconstruct the cumulative total that the API would have shown yesterday.
+    All users are resolved in one grouped query; users with no prior rows are
+    absent from the result (treat as 0).
     """
     query = """
         SELECT
+            user_email,
             COALESCE(SUM(daily_spend_usd), 0) as cumulative_spend
         FROM `ai_usage_analytics.cursor_daily_metrics`
-        WHERE user_email = @user_email
+        WHERE user_email IN UNNEST(@user_emails)
           AND activity_date < @current_date
           AND activity_date >= DATE(@billing_cycle_start)
+        GROUP BY user_email
     """
 
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
-            bigquery.ScalarQueryParameter("user_email", "STRING", user_email),
+            bigquery.ArrayQueryParameter("user_emails", "STRING", user_emails),
             bigquery.ScalarQueryParameter("current_date", "DATE", current_date.date()),
             bigquery.ScalarQueryParameter(
                 "billing_cycle_start",
@@ -104,8 +113,7 @@ def get_previous_cumulative_spend(
     )
 
     result = bq_client.query(query, job_config=job_config).result()
-    row = next(iter(result), None)
-    return float(row['cumulative_spend']) if row else 0.0
+    return {row['user_email']: float(row['cumulative_spend']) for row in result}
 
 
 def calculate_daily_spend_deltas(
@@ -127,23 +135,24 @@ def calculate_daily_spend_deltas(
     """
     daily_deltas = {}
 
-    for member in spend_members:
-        user_email = member.get('email')
-        if not user_email:
-            continue
+    # Previous cumulative from our database (one query for all users)
+    members = [member for member in spend_members if member.get('email')]
+    previous_spends = get_previous_cumulative_spends(
+        bq_client,
+        [member['email'] for member in members],
+        target_date,
+        billing_cycle_start
+    )
+
+    for member in members:
+        user_email = member['email']
 
         # Current cumulative from API
         spend_cents = member.get('spendCents', 0)
         included_cents = member.get('includedSpendCents', 0)
         current_cumulative_usd = (spend_cents + included_cents) / 100
 
-        # Previous cumulative from our database
-        previous_cumulative = get_previous_cumulative_spend(
-            bq_client,
-            user_email,
-            target_date,
-            billing_cycle_start
-        )
+        previous_cumulative = previous_spends.get(user_email, 0.0)
 
         # Calculate delta
         daily_delta = current_cumulative_usd - previous_cumulative
@@ -219,26 +228,31 @@ def update_daily_spend(
         logger.info("No spend deltas to update")
         return 0
 
-    # Build UPDATE query with CASE statement (cast to NUMERIC)
-    when_clauses = []
-    for email, delta in daily_deltas.items():
-        when_clauses.append(f"WHEN user_email = '{email}' THEN CAST({delta} AS NUMERIC)")
-
-    when_clause_sql = "\n          ".join(when_clauses)
-
-    query = f"""
-        UPDATE `ai_usage_analytics.cursor_daily_metrics`
-        SET daily_spend_usd = CASE
-          {when_clause_sql}
-        END
-        WHERE activity_date = @target_date
-          AND user_email IN UNNEST(@user_emails)
+    # Emails and deltas are bound as parallel array parameters (never spliced
+    # into the SQL text) and joined back together by position
+    query = """
+        UPDATE `ai_usage_analytics.cursor_daily_metrics` t
+        SET daily_spend_usd = d.daily_spend_usd
+        FROM (
+            SELECT email, spend AS daily_spend_usd
+            FROM UNNEST(@user_emails) AS email WITH OFFSET email_pos
+            JOIN UNNEST(@daily_spends) AS spend WITH OFFSET spend_pos
+              ON email_pos = spend_pos
+        ) d
+        WHERE t.activity_date = @target_date
+          AND t.user_email = d.email
     """
 
+    emails = list(daily_deltas.keys())
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
             bigquery.ScalarQueryParameter("target_date", "DATE", target_date.date()),
-            bigquery.ArrayQueryParameter("user_emails", "STRING", list(daily_deltas.keys())),
+            bigquery.ArrayQueryParameter("user_emails", "STRING", emails),
+            bigquery.ArrayQueryParameter(
+                "daily_spends",
+                "NUMERIC",
+                [Decimal(str(daily_deltas[email])) for email in emails]
+            ),
         ]
     )
 
@@ -288,8 +302,9 @@ def main():
         f"filtered to {len(filtered_data)} for {target_day_str}"
     )
 
+    ingestion_timestamp = datetime.now(timezone.utc).isoformat()
     usage_records = [
-        transform_usage_record(record, target_date)
+        transform_usage_record(record, target_date, ingestion_timestamp)
         for record in filtered_data
     ]
 
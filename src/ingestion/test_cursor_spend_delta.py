@@ -5,7 +5,6 @@ Test Cursor spend delta calculation with Oct 18-20 data
 This validates the delta logic before deploying to production.
 """
 
-import os
 from datetime import datetime, timezone
 from google.cloud import bigquery, secretmanager
 from cursor_client import CursorAdminClient